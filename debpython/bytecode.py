@@ -0,0 +1,217 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+import sys
+from binascii import unhexlify
+from os.path import join, split
+from struct import pack, unpack
+from subprocess import PIPE, Popen
+from debpython.tools import memoize
+
+log = logging.getLogger(__name__)
+# prints magic number of the interpreter (works with all Python 3.X versions)
+MAGIC_SCRIPT = '''
+import binascii, sys
+try:
+    from importlib.util import MAGIC_NUMBER
+except ImportError:
+    from imp import get_magic
+    MAGIC_NUMBER = get_magic()
+sys.stdout.write(binascii.hexlify(MAGIC_NUMBER).decode('ascii'))
+'''
+
+
+def magic_tag(version):
+    """Return magic tag used in __pycache__ file names.
+
+    >>> magic_tag((3, 2))
+    'cpython-32'
+    >>> magic_tag((3, 11))
+    'cpython-311'
+    """
+    return "cpython-%d%d" % tuple(version)
+
+
+def cache_from_source(fpath, version, optimization=0):
+    """Return path to byte compiled file for given source and Python version.
+
+    >>> cache_from_source('/usr/lib/python3/dist-packages/foo.py', (3, 2))
+    '/usr/lib/python3/dist-packages/__pycache__/foo.cpython-32.pyc'
+    >>> cache_from_source('/usr/share/foo/bar.py', (3, 1))
+    '/usr/share/foo/bar.pyc'
+    >>> cache_from_source('/usr/share/foo/bar.py', (3, 1), 2)
+    '/usr/share/foo/bar.pyo'
+    >>> cache_from_source('/usr/share/foo/bar.py', (3, 4), 1)
+    '/usr/share/foo/__pycache__/bar.cpython-34.pyo'
+    >>> cache_from_source('/usr/share/foo/bar.py', (3, 5), 2)
+    '/usr/share/foo/__pycache__/bar.cpython-35.opt-2.pyc'
+    """
+    version = tuple(version)
+    ext = 'pyo' if optimization and version < (3, 5) else 'pyc'
+    if version < (3, 2):
+        return "%s%s" % (fpath[:-2], ext)
+    dname, fname = split(fpath)
+    tag = magic_tag(version)
+    if optimization and version >= (3, 5):
+        tag = "%s.opt-%d" % (tag, optimization)
+    return join(dname, '__pycache__', "%s.%s.%s" % (fname[:-3], tag, ext))
+
+
+def split_cache_name(fname):
+    """Return (module name, magic tag, optimization) of __pycache__ file.
+
+    Returns None if file name doesn't look like byte compiled file.
+
+    >>> split_cache_name('foo.cpython-32.pyc')
+    ('foo', 'cpython-32', 0)
+    >>> split_cache_name('foo.bar.cpython-35.opt-2.pyc')
+    ('foo.bar', 'cpython-35', 2)
+    >>> split_cache_name('foo.cpython-34.pyo')
+    ('foo', 'cpython-34', 1)
+    >>> split_cache_name('foo.pyc') is None
+    True
+    """
+    parts = fname.split('.')
+    if len(parts) < 3 or parts[-1] not in ('pyc', 'pyo'):
+        return None
+    optimization = 1 if parts[-1] == 'pyo' else 0
+    if parts[-1] == 'pyc' and parts[-2].startswith('opt-'):
+        if len(parts) < 4 or not parts[-2][4:].isdigit():
+            return None
+        optimization = int(parts[-2][4:])
+        del parts[-2]
+    if not parts[0]:
+        return None
+    return '.'.join(parts[:-2]), parts[-2], optimization
+
+
+def header_size(version):
+    """Return size of the .pyc file header for given Python version.
+
+    >>> header_size((3, 1)), header_size((3, 3)), header_size((3, 7))
+    (8, 12, 16)
+    """
+    version = tuple(version)
+    if version < (3, 3):
+        return 8  # magic, mtime
+    elif version < (3, 7):
+        return 12  # magic, mtime, source size
+    return 16  # magic, flags (PEP 552), mtime, source size
+
+
+@memoize
+def get_magic(version):
+    """Return magic number of given Python version (None if not available)."""
+    version = tuple(version)
+    if version == sys.version_info[:2]:
+        try:
+            from importlib.util import MAGIC_NUMBER
+        except ImportError:  # Python < 3.4
+            import imp
+            return imp.get_magic()
+        return MAGIC_NUMBER
+    try:
+        process = Popen(["python%d.%d" % version, '-c', MAGIC_SCRIPT],
+                        stdout=PIPE)
+    except OSError as e:
+        log.debug('cannot get magic number of Python %d.%d: %s',
+                  version[0], version[1], e)
+        return None
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        log.debug('cannot get magic number of Python %d.%d', *version)
+        return None
+    return unhexlify(output.strip())
+
+
+def update_header(header, version, fstat):
+    """Return .pyc file header with source's mtime and size from fstat.
+
+    Hash based .pyc files (PEP 552) do not depend on source's metadata.
+
+    >>> from os import stat_result
+    >>> fstat = stat_result((0, 0, 0, 0, 0, 0, 10, 0, 20, 0))
+    >>> update_header(b'MAGI' + bytes(4), (3, 2), fstat)
+    b'MAGI\\x14\\x00\\x00\\x00'
+    >>> update_header(b'MAGI' + bytes(12), (3, 7), fstat)[8:]
+    b'\\x14\\x00\\x00\\x00\\n\\x00\\x00\\x00'
+    """
+    size = header_size(version)
+    prefix = header[:size - 8] if size > 8 else header[:4]
+    if size == 16 and unpack('<I', header[4:8])[0] & 0b1:
+        return header
+    result = prefix + pack('<I', int(fstat.st_mtime) & 0xFFFFFFFF)
+    if size > 8:
+        result += pack('<I', fstat.st_size & 0xFFFFFFFF)
+    return result
+
+
+def is_uptodate(fpath, version, fstat, optimization=0):
+    """Check if byte compiled file's header matches source's mtime and size.
+
+    Magic number has to match the one of given Python version as well.
+
+    :param fstat: result of os.stat() called on source file
+    """
+    cpath = cache_from_source(fpath, version, optimization)
+    size = header_size(version)
+    try:
+        with open(cpath, 'rb') as fp:
+            header = fp.read(size)
+    except (IOError, OSError):
+        return False
+    if len(header) != size:
+        return False
+
+    version = tuple(version)
+    magic = get_magic(version)
+    if magic is None or header[:4] != magic:
+        return False  # interpreter not available or file generated by other
+    if size == 16:
+        flags = unpack('<I', header[4:8])[0]
+        if flags & 0b1:  # hash based .pyc file
+            return _hash_matches(fpath, version, header)
+        header = header[:4] + header[8:]
+
+    mtime = unpack('<I', header[4:8])[0]
+    if mtime != int(fstat.st_mtime) & 0xFFFFFFFF:
+        return False
+    if size > 8:
+        source_size = unpack('<I', header[8:12])[0]
+        if source_size != fstat.st_size & 0xFFFFFFFF:
+            return False
+    return True
+
+
+def _hash_matches(fpath, version, header):
+    """Check source hash stored in PEP 552 .pyc file header.
+
+    Source hash can be calculated by the running interpreter only.
+    """
+    if version != sys.version_info[:2]:
+        return False
+    from importlib.util import source_hash
+    try:
+        with open(fpath, 'rb') as fp:
+            return source_hash(fp.read()) == header[8:16]
+    except (IOError, OSError):
+        return False
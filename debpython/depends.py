@@ -24,6 +24,8 @@ from debpython.version import vrepr, vrange_str
 
 # minimum version required for py3compile/py3clean:
 MINPYCDEP = 'python3 (>= 3.1.2-8~)'
+# minimum version required for py3compile's -O option:
+MINPYCOPTDEP = 'python3 (>= 3.1.3-13~)'
 
 log = logging.getLogger(__name__)
 
@@ -88,9 +90,12 @@ class Dependencies:
     def parse(self, stats, options):
         log.debug('generating dependencies for package %s', self.package)
 
+        optimize = sorted(set(getattr(options, 'optimize', None) or []))
+        pycdep = MINPYCOPTDEP if optimize else MINPYCDEP
+
         # make sure py3compile binary is available
         if stats['compile']:
-            self.depend(MINPYCDEP)
+            self.depend(pycdep)
 
         for interpreter, version in stats['shebangs']:
             self.depend(interpreter)
@@ -106,7 +111,7 @@ class Dependencies:
                 # TODO: if versions[0] not in requested_versions: FTBFS
             elif details.get('compile', False):
                 # no hardcoded versions, but there's something to compile
-                self.depend(MINPYCDEP)
+                self.depend(pycdep)
                 args = ''
                 vr = options.vrange
                 if vr:
@@ -118,6 +123,8 @@ class Dependencies:
 
                 for pattern in options.regexpr or []:
                     args += " -X '%s'" % pattern.replace("'", r"\'")
+                for level in optimize:
+                    args += " -O %s" % level
                 self.rtscript((private_dir, args))
 
         if options.guess_deps:
@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+import re
+
+log = logging.getLogger(__name__)
+# numbered and named backreferences change meaning in combined regexpr
+BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class ExcludeMatcher:
+    """Classify file names using (type_, versions, dname, pattern) rules.
+
+    "dir" rules are kept in a prefix table (one set of prefixes per prefix
+    length), "re" rules are combined into one regular expression for each
+    set of versions.
+
+    >>> m = ExcludeMatcher([('dir', {(3, 1)}, '/usr/share/foo/', None),
+    ...                     ('re', {(3, 2)}, '/', re.compile('.*/test_')),
+    ...                     ('re', {(3, 2)}, '/', re.compile('.*/bar[.]py'))])
+    >>> sorted(m.excluded('/usr/share/foo/test_a.py'))
+    [(3, 1), (3, 2)]
+    >>> sorted(m.excluded('/usr/lib/bar.py'))
+    [(3, 2)]
+    >>> m.excluded('/usr/lib/baz.py')
+    set()
+    """
+
+    def __init__(self, patterns):
+        self.prefixes = {}  # length -> {prefix: versions}
+        self.regexprs = []  # [(compiled regexpr, versions), ...]
+
+        re_rules = {}
+        for type_, vers, dname, pattern in patterns or []:
+            vers = frozenset(vers)
+            if type_ == 'dir':
+                table = self.prefixes.setdefault(len(dname), {})
+                table[dname] = table.get(dname, frozenset()) | vers
+            elif type_ == 're':
+                re_rules.setdefault(vers, []).append(pattern)
+        self.prefix_lengths = sorted(self.prefixes)
+
+        for vers, rules in re_rules.items():
+            combinable = [i for i in rules
+                          if not BACKREF_RE.search(i.pattern) and
+                          not i.flags & ~re.UNICODE]
+            others = [i for i in rules if i not in combinable]
+            if len(combinable) > 1:
+                try:
+                    combined = re.compile('|'.join("(?:%s)" % i.pattern
+                                                   for i in combinable))
+                except re.error as e:  # f.e. duplicated group names
+                    log.debug('cannot combine exclude patterns: %s', e)
+                    others = rules
+                else:
+                    self.regexprs.append((combined, vers))
+            else:
+                others = rules
+            for pattern in others:
+                self.regexprs.append((pattern, vers))
+
+    def __bool__(self):
+        return bool(self.prefixes or self.regexprs)
+
+    def excluded(self, fn, versions=None):
+        """Return set of versions for which given file should be skipped.
+
+        :param versions: stop matching once all these versions are excluded
+        """
+        result = set()
+        for length in self.prefix_lengths:
+            vers = self.prefixes[length].get(fn[:length])
+            if vers is not None:
+                result.update(vers)
+        if versions and result.issuperset(versions):
+            return result
+        for pattern, vers in self.regexprs:
+            if vers <= result:
+                continue
+            if pattern.match(fn):
+                result.update(vers)
+                if versions and result.issuperset(versions):
+                    break
+        return result
@@ -0,0 +1,82 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+from glob import glob1
+from os import environ
+from os.path import exists, join
+from subprocess import PIPE, Popen
+
+log = logging.getLogger(__name__)
+
+
+def dpkg_list_file(package_name, admindir=None):
+    """Return path to dpkg's list of files installed by given package.
+
+    Multi-Arch: same packages are listed in <package>:<arch>.list files.
+    Returns None if list file cannot be found.
+    """
+    if admindir is None:
+        admindir = environ.get('DPKG_ADMINDIR', '/var/lib/dpkg')
+    infodir = join(admindir, 'info')
+    fpath = join(infodir, "%s.list" % package_name)
+    if exists(fpath):
+        return fpath
+    if ':' not in package_name:
+        names = glob1(infodir, "%s:*.list" % package_name)
+        if len(names) == 1:
+            return join(infodir, names[0])
+        # more than one architecture installed, let dpkg decide
+    return None
+
+
+def dpkg_files(package_name):
+    """Generate file names installed by given package.
+
+    dpkg's database is read directly, "dpkg -L" is invoked only if list file
+    cannot be found.
+    """
+    fpath = dpkg_list_file(package_name)
+    if fpath:
+        try:
+            fp = open(fpath, 'r', encoding='utf-8')
+        except (IOError, OSError) as e:
+            log.debug('cannot read %s, falling back to dpkg -L: %s', fpath, e)
+        else:
+            with fp:
+                for line in fp:
+                    yield line.rstrip('\n')
+            return
+
+    process = Popen(['/usr/bin/dpkg', '-L', package_name], stdout=PIPE)
+    for line in process.stdout:
+        yield str(line, 'utf-8').rstrip('\n')
+    process.stdout.close()
+    if process.wait() != 0:
+        log.error('cannot get content of %s', package_name)
+        exit(2)
+
+
+def get_package_files(package_name):
+    """Generate *.py file names available in given package."""
+    for fpath in dpkg_files(package_name):
+        if fpath.endswith('.py'):
+            yield fpath
@@ -0,0 +1,178 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+import logging
+from hashlib import sha256
+from os import getpid, makedirs, remove, rename
+from os.path import dirname, exists, isdir
+from debpython.bytecode import cache_from_source, header_size, \
+    is_uptodate, update_header
+from debpython.version import getver, vrepr
+
+log = logging.getLogger(__name__)
+
+
+def file_hash(fpath):
+    """Return SHA-256 hex digest of given file's content."""
+    result = sha256()
+    with open(fpath, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(65536), b''):
+            result.update(chunk)
+    return result.hexdigest()
+
+
+def pyc_key(version, optimization=0):
+    """Return key used to store .pyc file path in manifest entry.
+
+    >>> pyc_key((3, 2))
+    '3.2'
+    >>> pyc_key((3, 5), 1)
+    '3.5.opt-1'
+    """
+    if optimization:
+        return "%s.opt-%d" % (vrepr(version), optimization)
+    return vrepr(version)
+
+
+class Manifest:
+    """Remembers byte compiled files between py3compile invocations.
+
+    Each source file is mapped to its size, mtime, content hash and .pyc
+    files generated for each Python version. Source files that didn't
+    change since last run (and which .pyc files are still there) do not
+    have to be checked again.
+    """
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.entries = {}
+        self.pending = []
+        self.modified = False
+        if exists(fpath):
+            try:
+                with open(fpath, 'r', encoding='utf-8') as fp:
+                    self.entries = json.load(fp)
+            except (IOError, OSError, ValueError) as e:
+                log.warning('cannot read manifest file %s, ignoring it: %s',
+                            fpath, e)
+
+    def is_uptodate(self, fpath, version, fstat, optimization=0):
+        """Check if source and its .pyc file didn't change since last run.
+
+        If only source's mtime changed (its content hash still matches),
+        entry is refreshed instead (see :meth:`refresh`).
+        """
+        entry = self.entries.get(fpath)
+        if not entry or entry['size'] != fstat.st_size:
+            return False
+        key = pyc_key(version, optimization)
+        cpath = entry['pyc'].get(key)
+        if cpath is None or not exists(cpath):
+            return False
+        if entry['mtime'] != int(fstat.st_mtime):
+            return self.refresh(fpath, entry, fstat) and key in entry['pyc']
+        return True
+
+    def refresh(self, fpath, entry, fstat):
+        """Update entry and its .pyc files' headers with source's new mtime.
+
+        .pyc files are replaced atomically (new header and the rest of the
+        file are written to a temporary file first), so that interpreter
+        importing the module never reads a half written file.
+        Returns False if source's content changed.
+        """
+        try:
+            digest = file_hash(fpath)
+        except (IOError, OSError):
+            return False
+        if digest != entry.get('sha256'):
+            return False
+        for key, cpath in list(entry['pyc'].items()):
+            version = getver(key.partition('.opt-')[0])
+            size = header_size(version)
+            tmp_path = "%s.%d" % (cpath, getpid())
+            try:
+                with open(cpath, 'rb') as fp:
+                    header = fp.read(size)
+                    if len(header) != size:
+                        raise IOError('truncated header')
+                    with open(tmp_path, 'wb') as tmp_fp:
+                        tmp_fp.write(update_header(header, version, fstat))
+                        tmp_fp.write(fp.read())
+                rename(tmp_path, cpath)
+            except (IOError, OSError) as e:
+                log.debug('cannot update %s: %s', cpath, e)
+                if exists(tmp_path):
+                    remove(tmp_path)
+                del entry['pyc'][key]
+        entry['mtime'] = int(fstat.st_mtime)
+        self.modified = True
+        return True
+
+    def update(self, fpath, version, fstat, optimization=0):
+        """Register up-to-date .pyc file."""
+        entry = self.entries.get(fpath)
+        if not entry or entry['size'] != fstat.st_size or\
+           entry['mtime'] != int(fstat.st_mtime):
+            try:
+                digest = file_hash(fpath)
+            except (IOError, OSError):
+                return
+            entry = self.entries[fpath] = {'size': fstat.st_size,
+                                           'mtime': int(fstat.st_mtime),
+                                           'sha256': digest,
+                                           'pyc': {}}
+        entry['pyc'][pyc_key(version, optimization)] = \
+            cache_from_source(fpath, version, optimization)
+        self.modified = True
+
+    def add_pending(self, fpath, version, fstat, optimization=0):
+        """Register file sent to byte compilation process.
+
+        It will be added to the manifest in :meth:`save` if .pyc file
+        was generated.
+        """
+        self.pending.append((fpath, version, fstat, optimization))
+
+    def save(self):
+        for fpath, version, fstat, optimization in self.pending:
+            if is_uptodate(fpath, version, fstat, optimization):
+                self.update(fpath, version, fstat, optimization)
+            elif fpath in self.entries:
+                self.entries[fpath]['pyc'].pop(pyc_key(version, optimization),
+                                               None)
+                self.modified = True
+        self.pending = []
+        if not self.modified:
+            return
+
+        dname = dirname(self.fpath)
+        try:
+            if dname and not isdir(dname):
+                makedirs(dname)
+            with open(self.fpath + '.new', 'w', encoding='utf-8') as fp:
+                json.dump(self.entries, fp, sort_keys=True)
+            rename(self.fpath + '.new', self.fpath)
+        except (IOError, OSError) as e:
+            log.error('cannot write manifest file %s: %s', self.fpath, e)
+        else:
+            self.modified = False
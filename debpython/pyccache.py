@@ -0,0 +1,263 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+from hashlib import sha256
+from os import geteuid, getpid, link, lstat, makedirs, remove, rename, stat,\
+    utime, walk
+from os.path import dirname, exists, getsize, join
+from shutil import copyfile
+from stat import S_ISDIR
+from debpython.bytecode import cache_from_source, get_magic, header_size,\
+    is_uptodate, update_header
+from debpython.manifest import file_hash
+
+log = logging.getLogger(__name__)
+DEFAULT_SIZE = 512  # MiB
+# total size of entries (updated by PycCache.save and PycCache.evict)
+SIZE_FILE = 'size'
+
+
+class PycCache:
+    """Content addressed cache of byte compiled files.
+
+    Entries are stored in DIR/XY/KEY.pyc files, where KEY is a SHA-256 of
+    interpreter's magic number, optimization level, source file's path
+    (it's embedded in code objects) and content. Source's mtime and size
+    are stored in .pyc file's header, it is updated when cached file is
+    installed if it doesn't match.
+
+    Entries are hardlinked if possible and copied otherwise. Entry's mtime
+    is updated on each hit, the least recently used ones are removed by
+    :meth:`evict` if cache grows over the size limit. Total size of entries
+    is kept in DIR/size file so that the cache doesn't have to be scanned
+    on each run.
+
+    Cache is disabled if its directory is not owned by root (or the current
+    user) or if it's writable by others, entries could be replaced then.
+    """
+
+    def __init__(self, dpath, max_size=DEFAULT_SIZE):
+        self.dpath = dpath
+        self.max_size = max_size * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.pending = []
+        self.stored = 0  # size of entries added by this instance
+        self.enabled = True
+        try:
+            dstat = stat(dpath)
+        except OSError:
+            return  # created when the first entry is stored
+        if not S_ISDIR(dstat.st_mode) or dstat.st_mode & 0o022 or \
+           dstat.st_uid not in (0, geteuid()):
+            log.warning('cache directory %s is not owned by root or is '
+                        'writable by others, not using it', dpath)
+            self.enabled = False
+
+    def key(self, fpath, version, optimization, digest):
+        magic = get_magic(version)
+        if magic is None:
+            return None
+        result = sha256(magic)
+        result.update(("\0%d\0%s\0%s" % (optimization or 0, fpath, digest))
+                      .encode('utf-8', 'surrogateescape'))
+        return result.hexdigest()
+
+    def entry_path(self, key):
+        return join(self.dpath, key[:2], "%s.pyc" % key)
+
+    def install(self, fpath, version, fstat, levels, lookup=True,
+                dfile=None):
+        """Install .pyc files for given source from the cache.
+
+        Returns True if files for all optimization levels were installed.
+        Missing ones are stored in the cache by :meth:`save` (once they
+        are generated).
+
+        :param lookup: do not check the cache, just register files to store
+        :param dfile: file name embedded in byte code (default: fpath)
+        """
+        if not self.enabled:
+            return False
+        try:
+            digest = file_hash(fpath)
+        except (IOError, OSError):
+            return False
+        missing = []
+        for level in levels:
+            key = self.key(dfile or fpath, version, level, digest)
+            if key is None:
+                return False
+            if not lookup or not self.fetch(key, fpath, version, fstat,
+                                            level):
+                missing.append((key, level))
+        if not missing:
+            self.hits += 1
+            return True
+        self.misses += 1
+        for key, level in missing:
+            self.pending.append((key, fpath, version, fstat, level))
+        return False
+
+    def fetch(self, key, fpath, version, fstat, optimization=0):
+        """Copy or hardlink cached entry to source's .pyc file location."""
+        epath = self.entry_path(key)
+        cpath = cache_from_source(fpath, version, optimization)
+        size = header_size(version)
+        tmp_path = "%s.%d" % (cpath, getpid())
+        try:
+            with open(epath, 'rb') as fp:
+                header = fp.read(size)
+                if len(header) != size:
+                    return False
+                new_header = update_header(header, version, fstat)
+                linked = False
+                # Python < 3.3 doesn't replace .pyc files atomically,
+                # hardlinked entry would be overwritten
+                if new_header == header and tuple(version) >= (3, 3):
+                    try:
+                        link(epath, tmp_path)
+                        linked = True
+                    except OSError:  # f.e. different file systems
+                        pass
+                if not linked:
+                    with open(tmp_path, 'wb') as tmp_fp:
+                        tmp_fp.write(new_header)
+                        tmp_fp.write(fp.read())
+            rename(tmp_path, cpath)
+        except (IOError, OSError) as e:
+            if exists(epath):
+                log.debug('cannot install %s from cache: %s', cpath, e)
+            if exists(tmp_path):
+                remove(tmp_path)
+            return False
+        try:
+            utime(epath, None)  # mark as recently used
+        except OSError:
+            pass
+        return True
+
+    def store(self, key, fpath, version, fstat, optimization=0):
+        """Add up-to-date .pyc file to the cache.
+
+        Returns size of the new entry (0 if nothing was stored).
+        """
+        cpath = cache_from_source(fpath, version, optimization)
+        if not is_uptodate(fpath, version, fstat, optimization):
+            return 0  # checks magic number as well
+        try:
+            size = getsize(cpath)
+        except (IOError, OSError):
+            return 0
+        epath = self.entry_path(key)
+        if exists(epath):
+            return 0
+        tmp_path = "%s.%d" % (epath, getpid())
+        try:
+            if not exists(dirname(epath)):
+                makedirs(dirname(epath))
+            try:
+                if tuple(version) < (3, 3):
+                    raise OSError('cannot hardlink')
+                link(cpath, tmp_path)
+            except OSError:
+                copyfile(cpath, tmp_path)
+            rename(tmp_path, epath)
+        except (IOError, OSError) as e:
+            log.warning('cannot store %s in cache: %s', cpath, e)
+            return 0
+        return size
+
+    def read_size(self):
+        """Return total size of entries or None if it's not known."""
+        try:
+            with open(join(self.dpath, SIZE_FILE), 'r') as fp:
+                return int(fp.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def write_size(self, total):
+        fpath = join(self.dpath, SIZE_FILE)
+        tmp_path = "%s.%d" % (fpath, getpid())
+        try:
+            with open(tmp_path, 'w') as fp:
+                fp.write("%d\n" % total)
+            rename(tmp_path, fpath)
+        except (IOError, OSError) as e:
+            log.debug('cannot write %s: %s', fpath, e)
+
+    def save(self):
+        """Store .pyc files registered by :meth:`install`."""
+        stored = 0
+        for args in self.pending:
+            stored += self.store(*args)
+        self.pending = []
+        if stored:
+            total = self.read_size()
+            if total is not None:  # otherwise evict() will count it
+                self.write_size(total + stored)
+            self.stored += stored
+
+    def evict(self):
+        """Remove the least recently used entries if cache is too big.
+
+        Nothing is done if no entries were stored by :meth:`save` or if
+        the recorded total size is within the limit, entries are scanned
+        only if it's not.
+        """
+        if not self.stored:
+            return 0
+        total = self.read_size()
+        if total is not None and total <= self.max_size:
+            return 0
+
+        entries = []
+        total = 0
+        for root, dirs, files in walk(self.dpath):
+            for fn in files:
+                if root == self.dpath:  # size file, temporary files
+                    continue
+                fpath = join(root, fn)
+                try:
+                    fstat = lstat(fpath)
+                except OSError:
+                    continue
+                entries.append((fstat.st_mtime, fstat.st_size, fpath))
+                total += fstat.st_size
+        if total <= self.max_size:
+            self.write_size(total)
+            return 0
+        entries.sort()
+        removed = 0
+        for mtime, size, fpath in entries:
+            try:
+                remove(fpath)
+            except OSError as e:
+                log.debug('cannot remove %s: %s', fpath, e)
+                continue
+            total -= size
+            removed += 1
+            if total <= self.max_size:
+                break
+        self.write_size(total)
+        log.debug('%d files removed from the cache', removed)
+        return removed
@@ -0,0 +1,226 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+import re
+from configparser import ConfigParser, Error as ConfigError
+from glob import glob1
+from os import makedirs, rename, stat
+from os.path import dirname, isdir
+from subprocess import PIPE, Popen
+from debpython.bytecode import magic_tag
+from debpython.version import getver, vrepr
+
+log = logging.getLogger(__name__)
+TAGS_REGISTRY = '/var/cache/python3/magic_tags'
+DEFAULTS_FILE = '/usr/share/python3/debian_defaults'
+INTERPRETER_RE = re.compile(r'python(3\.\d+)$')
+# prints magic tag of the interpreter (works with all Python >= 3.2)
+TAG_SCRIPT = '''
+import sys
+try:
+    tag = sys.implementation.cache_tag
+except AttributeError:
+    import imp
+    tag = imp.get_tag()
+sys.stdout.write(tag)
+'''
+
+
+def interpreter_mtime(version):
+    """Return mtime of given Python interpreter (None if not installed)."""
+    try:
+        return int(stat("/usr/bin/python%d.%d" % tuple(version)).st_mtime)
+    except OSError:
+        return None
+
+
+def installed_versions(versions=None):
+    """Return installed Python versions that use __pycache__ directories.
+
+    :param versions: versions to check, all python3.X interpreters found in
+        /usr/bin by default (including the ones that are not supported
+        yet, their files shouldn't be treated as garbage)
+    """
+    if versions is None:
+        versions = set()
+        for fn in glob1('/usr/bin', 'python3.*'):
+            match = INTERPRETER_RE.match(fn)
+            if match:
+                versions.add(getver(match.group(1)))
+    result = set()
+    for version in versions:
+        if tuple(version) < (3, 2):  # 3.1 doesn't use __pycache__
+            continue
+        if interpreter_mtime(version) is None:
+            log.debug("version %s not installed, skipping", vrepr(version))
+            continue
+        result.add(tuple(version))
+    return result
+
+
+def read_registry(fpath=TAGS_REGISTRY):
+    """Return {version: (magic tag, interpreter's mtime)} from registry.
+
+    Each line of registry file contains Python version, its magic tag and
+    mtime of the interpreter at the time tag was recorded. Returns None if
+    registry file is not available.
+    """
+    result = {}
+    try:
+        with open(fpath, 'r', encoding='utf-8') as fp:
+            for line in fp:
+                parts = line.split()
+                if len(parts) != 3 or line.startswith('#'):
+                    continue
+                try:
+                    result[getver(parts[0])] = (parts[1], int(parts[2]))
+                except ValueError:
+                    continue
+    except (IOError, OSError) as e:
+        log.debug('cannot read magic tags registry: %s', e)
+        return None
+    return result
+
+
+def write_registry(entries, fpath=TAGS_REGISTRY):
+    """Save {version: (magic tag, interpreter's mtime)} in registry file."""
+    dname = dirname(fpath)
+    try:
+        if dname and not isdir(dname):
+            makedirs(dname)
+        with open(fpath + '.new', 'w', encoding='utf-8') as fp:
+            fp.write('# VERSION MAGIC_TAG INTERPRETER_MTIME\n')
+            for version, (tag, mtime) in sorted(entries.items()):
+                fp.write("%s %s %d\n" % (vrepr(version), tag, mtime))
+        rename(fpath + '.new', fpath)
+    except (IOError, OSError) as e:
+        log.debug('cannot write magic tags registry: %s', e)
+        return False
+    return True
+
+
+def defaults_tags(fpath=DEFAULTS_FILE):
+    """Return {version: magic tag} for versions listed in debian_defaults.
+
+    Magic tag of Debian's CPython interpreters is derived from version.
+    """
+    config = ConfigParser()
+    try:
+        with open(fpath, 'r', encoding='utf-8') as fp:
+            # read_file is not available in Python < 3.2
+            (getattr(config, 'read_file', None) or config.readfp)(fp)
+    except (IOError, OSError, ConfigError) as e:
+        log.debug('cannot read %s: %s', fpath, e)
+        return {}
+    result = {}
+    for key in ('default-version', 'supported-versions', 'old-versions'):
+        if not config.has_option('DEFAULT', key):
+            continue
+        value = config.get('DEFAULT', key)
+        for item in value.split(','):
+            item = item.strip().replace('python', '')
+            if not item:
+                continue
+            try:
+                version = getver(item)
+            except ValueError:
+                continue
+            if version >= (3, 2):  # 3.1 doesn't use __pycache__
+                result[version] = magic_tag(version)
+    return result
+
+
+def query_tag(version):
+    """Return magic tag reported by given Python interpreter."""
+    cmd = ["/usr/bin/python%d.%d" % tuple(version), '-c', TAG_SCRIPT]
+    log.debug('invoking %s', cmd[0])
+    try:
+        process = Popen(cmd, stdout=PIPE, stderr=PIPE)
+    except OSError as e:
+        log.debug('cannot invoke %s: %s', cmd[0], e)
+        return None
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        log.debug(stderr)
+        return None
+    return str(stdout, 'utf-8').strip() or None
+
+
+def update_registry(versions, fpath=TAGS_REGISTRY):
+    """Ask given interpreters for their tags and save the registry.
+
+    Entries of other versions are kept as long as they are installed.
+    """
+    entries = {}
+    for version, entry in (read_registry(fpath) or {}).items():
+        if interpreter_mtime(version) is not None:
+            entries[version] = entry
+    result = {}
+    for version in versions:
+        mtime = interpreter_mtime(version)
+        if mtime is None:
+            continue
+        tag = query_tag(version)
+        if tag:
+            entries[version] = (tag, mtime)
+            result[version] = tag
+    write_registry(entries, fpath)
+    return result
+
+
+def get_magic_tags(versions, fpath=TAGS_REGISTRY, defaults=DEFAULTS_FILE):
+    """Return {version: magic tag} for given installed Python versions.
+
+    Tags are taken from the registry (if interpreter didn't change since
+    it was recorded) or from debian_defaults based table. Interpreters
+    are invoked only for versions missing in both or with stale registry
+    entries (registry is updated then, if possible).
+    """
+    registry = read_registry(fpath)
+    table = None
+    result = {}
+    to_query = set()
+    for version in versions:
+        mtime = interpreter_mtime(version)
+        if mtime is None:
+            continue
+        entry = (registry or {}).get(version)
+        if entry and entry[1] == mtime:
+            result[version] = entry[0]
+            continue
+        if entry is None:
+            if table is None:
+                table = defaults_tags(defaults)
+            if version in table:
+                result[version] = table[version]
+                continue
+        to_query.add(version)
+
+    if to_query:
+        entries = dict(registry or {})
+        for version in to_query:
+            tag = query_tag(version)
+            if tag:
+                result[version] = tag
+                entries[version] = (tag, interpreter_mtime(version))
+        write_registry(entries, fpath)
+    return result
@@ -22,13 +22,17 @@
 import logging
 import os
 import re
+from collections import deque
 from pickle import dumps
+from threading import Thread
+from time import time
 from os.path import isdir, islink, join, split
 from debpython.version import getver
 
 log = logging.getLogger(__name__)
 EGGnPTH_RE = re.compile(r'(.*?)(-py\d\.\d(?:-[^.]*)?)?(\.egg-info|\.pth)$')
 SHEBANG_RE = re.compile(r'^#!\s*/usr/bin/(?:env\s+)?(python(\d+(?:\.\d+)?)?(?:-dbg)?).*')
+SHEBANG_JOBS = 4  # number of threads used to read shebangs
 
 
 def sitedir(version, package=None, gdb=False):
@@ -89,30 +93,78 @@ def move_file(fpath, dstdir):
         os.rename(fpath, dstdir)
 
 
+def parse_shebang(data):
+    """Return Python interpreter and version from the first line of file.
+
+    >>> parse_shebang(b'#! /usr/bin/python3.2 -E')
+    ('python3.2', (3, 2))
+    >>> parse_shebang(b'#!/usr/bin/env python3')
+    ('python3', None)
+    >>> parse_shebang(b'#!/bin/sh') is None
+    True
+    """
+    match = SHEBANG_RE.match(data.decode('latin-1'))
+    if not match:
+        return None
+    res = match.groups()
+    if res != (None, None):
+        if res[1]:
+            if len(res[1]) == 1:  # "python3"
+                res = (res[0], None)
+            else:
+                res = res[0], getver(res[1])
+        return res
+
+
 def shebang2pyver(fname):
     """Check file's shebang.
 
+    Only first 2 bytes are read from files that do not start with "#!".
+
     :rtype: tuple
     :returns: pair of Python interpreter string and Python version
     """
     try:
-        with open(fname) as fp:
-            data = fp.read(32)
-            match = SHEBANG_RE.match(data)
-            if not match:
+        with open(fname, 'rb', buffering=0) as fp:
+            data = fp.read(2)
+            if data != b'#!':
                 return None
-            res = match.groups()
-            if res != (None, None):
-                if res[1]:
-                    if len(res[1]) == 1:  # "python3"
-                        res = (res[0], None)
-                    else:
-                        res = res[0], getver(res[1])
-                return res
+            return parse_shebang(data + fp.read(30))
     except IOError:
         log.error('cannot open %s', fname)
 
 
+def shebangs2pyver(fnames, jobs=SHEBANG_JOBS):
+    """Check shebangs of many files using a small pool of threads.
+
+    :rtype: dict
+    :returns: {file name: (Python interpreter string, Python version)}
+        for files with Python shebang
+    """
+    queue = deque(fnames)
+    result = {}
+
+    def check():
+        while True:
+            try:
+                fname = queue.popleft()
+            except IndexError:
+                return
+            res = shebang2pyver(fname)
+            if res:
+                result[fname] = res
+
+    if len(queue) < 2 or jobs < 2:
+        check()
+    else:
+        threads = [Thread(target=check) for i in range(min(jobs, len(queue)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return result
+
+
 def clean_egg_name(name):
     """Remove Python version and platform name from Egg files/dirs.
 
@@ -137,3 +189,94 @@ class memoize:
         if key not in self.cache:
             self.cache[key] = self.func(*args, **kwargs)
         return self.cache[key]
+
+
+class Stats:
+    """Measure wall time and number of calls/items of named phases.
+
+    Nested phases are not included in parent's time, i.e. each time slice
+    is assigned to the innermost active phase only.
+
+    >>> stats = Stats()
+    >>> with stats.phase('foo'):
+    ...     items = list(stats.iterate('bar', range(3)))
+    >>> [(name, count) for name, spent, count in stats.items()]
+    [('foo', 1), ('bar', 3)]
+    >>> list(Stats(enabled=False).iterate('bar', range(3)))
+    [0, 1, 2]
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.data = {}  # name -> [time, count]
+        self.order = []
+        self.stack = []
+        self.mark = None
+
+    def _switch(self, name):
+        """Assign time spent since last switch to current phase."""
+        now = time()
+        if self.stack:
+            self.data[self.stack[-1]][0] += now - self.mark
+        self.mark = now
+        if name is not None:
+            if name not in self.data:
+                self.data[name] = [0.0, 0]
+                self.order.append(name)
+            self.stack.append(name)
+
+    def start(self, name, count=1):
+        if self.enabled:
+            self._switch(name)
+            self.data[name][1] += count
+
+    def stop(self):
+        if self.enabled:
+            self._switch(None)
+            self.stack.pop()
+
+    def phase(self, name):
+        """Return context manager that measures given phase."""
+        return _Phase(self, name)
+
+    def iterate(self, name, iterable):
+        """Measure time spent in generating items of given iterable."""
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iterable)
+
+    def _iterate(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            self.start(name, count=0)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            self.data[name][1] += 1
+            yield item
+
+    def items(self):
+        """Return list of (name, time, count) tuples."""
+        return [(name, self.data[name][0], self.data[name][1])
+                for name in self.order]
+
+    def dump(self, fp):
+        """Write human readable table to given file object."""
+        fp.write("%-24s %10s %8s\n" % ('phase', 'time [s]', 'count'))
+        for name, spent, count in self.items():
+            fp.write("%-24s %10.3f %8d\n" % (name, spent, count))
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats.start(self.name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.stop()
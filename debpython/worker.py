@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+# Copyright © 2026 Piotr Ożarowski <piotr@debian.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Byte compile files which names are received on standard input.
+
+This script is started by py3compile with requested Python interpreter,
+so it has to work with all Python 3.X versions and cannot import other
+debpython modules. Command line arguments: optimization levels.
+
+Each input line contains file name, optionally followed by a tab and name
+that should be embedded in byte code instead (f.e. final location of file
+compiled in a staging directory).
+
+Result of each file is written to standard output as JSON object (one per
+line) with following keys: file, status ("ok" or "error"), time (in
+seconds), size (total size of generated files) and error (error message).
+"""
+
+import json
+import sys
+import time
+from os.path import getsize
+from py_compile import compile, PyCompileError
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def compile_file(fpath, levels=(None,), dfile=None):
+    """Byte compile given file for each optimization level.
+
+    :param levels: optimization levels, None means interpreter's default
+        (Python 3.1 doesn't support other ones)
+    :param dfile: file name used in tracebacks (default: fpath)
+    :returns: dictionary with file's status, compilation time and
+        total size of generated files
+    """
+    result = {'file': fpath, 'status': 'ok', 'size': 0}
+    start = timer()
+    for level in levels:
+        kwargs = {} if level is None else {'optimize': level}
+        try:
+            cfile = compile(fpath, dfile=dfile, doraise=True, **kwargs)
+            if cfile:  # Python >= 3.2
+                result['size'] += getsize(cfile)
+        except PyCompileError as e:
+            result['status'] = 'error'
+            result['error'] = e.msg.strip()
+            sys.stderr.write("%s\n" % e.msg.rstrip())
+            break
+        except (IOError, OSError) as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+            sys.stderr.write("%s\n" % e)
+            break
+    result['time'] = timer() - start
+    return result
+
+
+def main():
+    levels = [int(i) for i in sys.argv[1:]] or [None]
+    exit_code = 0
+    for line in sys.stdin.buffer:
+        fpath, _, dfile = line.decode('utf-8').rstrip('\n').partition('\t')
+        if not fpath:
+            continue
+        result = compile_file(fpath, levels, dfile or None)
+        if result['status'] != 'ok':
+            exit_code = 1
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+    exit(exit_code)
+
+if __name__ == '__main__':
+    main()
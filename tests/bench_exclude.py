@@ -0,0 +1,66 @@
+#! /usr/bin/python3
+# vim: et ts=4 sw=4
+"""Compare ExcludeMatcher with the linear loop previously used by py3compile.
+
+Usage: bench_exclude.py [NUMBER_OF_FILES] [NUMBER_OF_PATTERNS]
+"""
+
+import re
+import sys
+from os.path import dirname, join
+from timeit import default_timer
+sys.path.insert(0, join(dirname(__file__), '..'))
+from debpython.exclude import ExcludeMatcher
+
+VERSION_SETS = ({(3, 1)}, {(3, 2)}, {(3, 1), (3, 2)})
+
+
+def linear_loop(files, e_patterns, compile_versions):
+    for fn in files:
+        valid_versions = set(compile_versions)
+        for type_, vers, dname, pattern in e_patterns:
+            if type_ == 'dir' and fn.startswith(dname):
+                valid_versions = valid_versions - vers
+            elif type_ == 're' and pattern.match(fn):
+                valid_versions = valid_versions - vers
+            if not valid_versions:
+                break
+        yield fn, valid_versions
+
+
+def matcher_loop(files, e_patterns, compile_versions):
+    matcher = ExcludeMatcher(e_patterns)
+    compile_versions = set(compile_versions)
+    for fn in files:
+        yield fn, compile_versions - matcher.excluded(fn, compile_versions)
+
+
+def main():
+    nfiles = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    npatterns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    files = ["/usr/lib/python3/dist-packages/pkg%d/mod%d/file%d.py" %
+             (i % 97, i % 13, i) for i in range(nfiles)]
+    e_patterns = []
+    for i in range(npatterns):
+        vers = VERSION_SETS[i % len(VERSION_SETS)]
+        if i % 2:
+            dname = "/usr/lib/python3/dist-packages/pkg%d/" % (i * 7 % 101)
+            e_patterns.append(('dir', vers, dname, None))
+        else:
+            pattern = re.compile(r'.*/mod%d/file\d*%d\.py$' % (i % 17, i))
+            e_patterns.append(('re', vers, '/', pattern))
+    versions = {(3, 1), (3, 2)}
+
+    results = []
+    for func in (linear_loop, matcher_loop):
+        start = default_timer()
+        result = list(func(files, e_patterns, versions))
+        results.append(result)
+        print("%-13s %8.3fs" % (func.__name__, default_timer() - start))
+    if results[0] != results[1]:
+        print('E: results differ')
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#! /usr/bin/python3
+# vim: et ts=4 sw=4
+"""Compare dh_python3's scan() with the os.walk based version it replaced.
+
+Usage: bench_scan.py [NUMBER_OF_FILES]
+
+A synthetic package tree (public and private modules, data files) is
+created in a temporary directory, scan() doesn't modify it.
+"""
+
+import os
+import sys
+from importlib.machinery import SourceFileLoader
+from os.path import dirname, join
+from shutil import rmtree
+from stat import ST_MODE, S_IXUSR, S_IXGRP, S_IXOTH
+from tempfile import mkdtemp
+from timeit import default_timer
+sys.path.insert(0, join(dirname(__file__), '..'))
+from debpython.pydist import PUBLIC_DIR_RE
+from debpython.tools import shebang2pyver, clean_egg_name
+from debpython.version import getver
+
+PACKAGE = 'python3-foo'
+dh_python3 = SourceFileLoader(
+    'dh_python3', join(dirname(__file__), '..', 'dh_python3')).load_module()
+log = dh_python3.log
+TAG_RE = dh_python3.TAG_RE
+EXTENSION_TAG = dh_python3.EXTENSION_TAG
+DBG_EXTENSION_TAG = dh_python3.DBG_EXTENSION_TAG
+
+
+def create_tree(nfiles):
+    public = join('debian', PACKAGE, 'usr/lib/python3/dist-packages')
+    private = join('debian', PACKAGE, 'usr/share', PACKAGE)
+    for i in range(nfiles):
+        if i % 4:
+            dname = join(public, "pkg%d" % (i % 50), "mod%d" % (i % 20))
+            fname = "file%d.py" % i
+        else:
+            dname = join(private, "data%d" % (i % 40))
+            fname = "file%d.txt" % i
+        if not os.path.isdir(dname):
+            os.makedirs(dname)
+        fpath = join(dname, fname)
+        with open(fpath, 'w') as fp:
+            fp.write('# %d\n' % i)
+        if i % 200 == 0:
+            os.chmod(fpath, 0o755)
+
+
+def old_scan(package, dname=None):
+    """scan() as it was before the rewrite (os.walk based)."""
+    r = {'requires.txt': set(),
+         'shebangs': set(),
+         'private_dirs': {},
+         'compile': False,
+         'ext': set()}
+
+    dbg_package = package.endswith('-dbg')
+
+    if not dname:
+        proot = "debian/%s" % package
+        if dname is False:
+            private_to_check = []
+        else:
+            private_to_check = [i % package for i in
+                                ('usr/lib/%s', 'usr/lib/games/%s',
+                                'usr/share/%s', 'usr/share/games/%s')]
+    else:
+        proot = join('debian', package, dname.strip('/'))
+        private_to_check = [dname[1:]]
+
+    for root, dirs, file_names in os.walk(proot):
+        # ignore Python 2.X locations
+        if '/usr/lib/python2' in root or\
+           '/usr/local/lib/python2' in root or\
+           '/usr/share/pyshared/' in root or\
+           '/usr/lib/pyshared/' in root:
+            # warn only once
+            tmp = root.replace('/local', '').split('/')
+            if len(tmp) == 5:  # debian/package/usr/foo/bar
+                log.warning('Python 2.x location detected, '
+                            'please use dh_python2: %s', root)
+            continue
+
+        bin_dir = private_dir = None
+        public_dir = PUBLIC_DIR_RE.match(root)
+        if not public_dir:
+            for i in private_to_check:
+                if root.startswith(join('debian', package, i)):
+                    private_dir = '/' + i
+                    break
+            else:  # i.e. not public_dir and not private_dir
+                if len(root.split('/', 6)) < 6 and (\
+                   root.endswith('/sbin') or root.endswith('/bin') or\
+                   root.endswith('/usr/games')):
+                   # /(s)bin or /usr/(s)bin or /usr/games
+                    bin_dir = root
+
+        for name in dirs:
+            if name == '__pycache__':
+                rmtree(join(root, name))
+                dirs.pop(dirs.index(name))
+                continue
+            # handle EGG related data (.egg-info dirs)
+            if name.endswith('.egg-info'):
+                if dbg_package:
+                    rmtree(join(root, name))
+                    dirs.pop(dirs.index(name))
+                    continue
+                clean_name = clean_egg_name(name)
+                if clean_name != name:
+                    log.warn('renaming %s to %s', name, clean_name)
+                    os.rename(join(root, name), join(root, clean_name))
+        if root.endswith('.egg-info') and 'requires.txt' in file_names:
+            r['requires.txt'].add(join(root, 'requires.txt'))
+            continue
+
+        # check files
+        for fn in file_names:
+            fext = fn.rsplit('.', 1)[-1]
+            if fext in ('pyc', 'pyo'):
+                os.remove(join(root, fn))
+                continue
+            # assume all extensions were build using cPython
+            elif fext == 'so' and 'cpython' not in fn:
+                old_fn = fn
+                if fn.endswith('_d.so'):
+                    fn = "%s.%s.so" % (fn[:-5], DBG_EXTENSION_TAG)
+                elif dbg_package:
+                    fn = "%s.%s.so" % (fn[:-3], DBG_EXTENSION_TAG)
+                else:
+                    fn = "%s.%s.so" % (fn[:-3], EXTENSION_TAG)
+                log.warn('renaming %s to %s', old_fn, fn)
+                os.rename(join(root, old_fn), join(root, fn))
+            if public_dir:
+                if dbg_package and fext not in ('so', 'h'):
+                    os.remove(join(root, fn))
+                    continue
+
+            elif private_dir:
+                mode = os.stat(join(root, fn))[ST_MODE]
+                if mode is S_IXUSR or mode is S_IXGRP or mode is S_IXOTH:
+                    res = shebang2pyver(join(root, fn))
+                    if res:
+                        r['private_dirs'].setdefault(private_dir, {})\
+                            .setdefault('shebangs', set()).add(res)
+
+            if public_dir or private_dir:
+                if fext == 'so':
+                    tagver = TAG_RE.search(fn).group(1)
+                    tagver = getver("%s.%s" % (tagver[0], tagver[1]))
+                    (r if public_dir else
+                     r['private_dirs'].setdefault(private_dir, {}))\
+                    ['ext'].add(tagver)
+                    continue
+                elif fext == 'py':
+                    (r if public_dir else
+                     r['private_dirs'].setdefault(private_dir, {}))\
+                    ['compile'] = True
+                    continue
+
+            # .egg-info files
+            if fn.endswith('.egg-info'):
+                clean_name = clean_egg_name(fn)
+                if clean_name != fn:
+                    log.warn('renaming %s to %s', fn, clean_name)
+                    os.rename(join(root, fn), join(root, clean_name))
+                continue
+            # search for scripts in bin dirs
+            if bin_dir:
+                fpath = join(root, fn)
+                res = shebang2pyver(fpath)
+                if res:
+                    r['shebangs'].add(res)
+
+    if dbg_package:
+        # remove empty directories in -dbg packages
+        proot = proot + '/usr/lib'
+        for root, dirs, file_names in os.walk(proot, topdown=False):
+            if '-packages/' in root and not file_names:
+                try:
+                    os.rmdir(root)
+                except:
+                    pass
+
+    log.debug("package %s details = %s", package, r)
+    return r
+
+
+
+def main():
+    nfiles = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    cwd = os.getcwd()
+    tmpdir = mkdtemp()
+    try:
+        os.chdir(tmpdir)
+        start = default_timer()
+        create_tree(nfiles)
+        print("%-13s %8.3fs (%d files)" % ('create_tree',
+                                            default_timer() - start, nfiles))
+        results = []
+        for func in (old_scan, dh_python3.scan):
+            start = default_timer()
+            results.append(func(PACKAGE))
+            print("%-13s %8.3fs" % (func.__name__, default_timer() - start))
+    finally:
+        os.chdir(cwd)
+        rmtree(tmpdir)
+    if results[0] != results[1]:
+        print('E: results differ')
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -39,4 +39,167 @@ if [ -x /usr/bin/python3.2 ]; then
 	|| echo "E: removing python3.2's pyc files failed"
 fi
 
+# tests below use default Python 3 interpreter (py3clean's -j, -n, --gc)
+VER=`/usr/bin/python3 -c 'import sys; print("%d.%d" % sys.version_info[:2])'`
+TAG=`/usr/bin/python3 -c 'import sys; print(sys.implementation.cache_tag)'`
+PYC=t1/lib/foo/__pycache__/__init__.$TAG
+# prints file name embedded in given .pyc file
+co_filename() {
+	/usr/bin/python$VER -c 'import marshal, sys
+fp = open(sys.argv[1], "rb")
+fp.read(16 if sys.version_info >= (3, 7) else 12)
+print(marshal.load(fp).co_filename)' $1
+}
+if [ -x /usr/bin/python$VER -a "$VER" != "3.1" ]; then
+	# -V removes optimized byte code as well
+	../py3compile t1/lib/ -vV $VER -O 1
+	test -f $PYC.pyc -a -f $PYC.opt-1.pyc \
+		|| (echo "E: byte-compiling for python$VER failed"; false)
+	../py3clean t1/lib/ -vV $VER
+	test -f $PYC.pyc -o -f $PYC.opt-1.pyc \
+		&& (echo "E: removing python$VER's pyc files failed"; false)
+
+	# --dry-run doesn't remove anything
+	../py3compile t1/lib/ -vV $VER
+	../py3clean t1/lib/ -v --dry-run --summary > /dev/null
+	test -f $PYC.pyc \
+		|| (echo "E: py3clean --dry-run removed files"; false)
+
+	# --gc removes orphaned files and files with unknown magic tags only
+	cp $PYC.pyc t1/lib/foo/__pycache__/removed.$TAG.pyc
+	cp $PYC.pyc t1/lib/foo/__pycache__/__init__.cpython-00.pyc
+	../py3clean t1/lib/ -v --gc
+	test -f t1/lib/foo/__pycache__/removed.$TAG.pyc \
+		&& (echo "E: py3clean --gc didn't remove orphaned file"; false)
+	test -f t1/lib/foo/__pycache__/__init__.cpython-00.pyc \
+		&& (echo "E: py3clean --gc didn't remove unknown tag's file"; false)
+	test -f $PYC.pyc \
+		|| (echo "E: py3clean --gc removed up-to-date file"; false)
+
+	# clean using more than one thread
+	../py3clean t1/lib/ -v -j 2
+	[ `find t1/lib/ -name '*.pyc' | wc -l` = "0" ] \
+		|| (echo "E: py3clean -j 2 failed"; false)
+
+	# --cache: files are stored on first run and installed on the next one
+	CACHE=`mktemp -d`
+	../py3compile t1/lib/ -V $VER --cache $CACHE/c
+	[ `find $CACHE/c -name '*.pyc' | wc -l` = "3" ] \
+		|| (echo "E: py3compile --cache didn't store files"; false)
+	../py3clean t1/lib/
+	../py3compile t1/lib/ -vV $VER --cache $CACHE/c 2>&1 \
+		| grep -q 'installed from cache: 3,' \
+		|| (echo "E: py3compile --cache didn't use cached files"; false)
+	test -f $PYC.pyc \
+		|| (echo "E: py3compile --cache didn't install files"; false)
+	# entries over the size limit are removed
+	../py3clean t1/lib/
+	rm -rf $CACHE/c/*
+	../py3compile t1/lib/ -V $VER --cache $CACHE/c --cache-size 0
+	[ `find $CACHE/c -name '*.pyc' | wc -l` = "0" ] \
+		|| (echo "E: py3compile --cache-size 0 didn't evict files"; false)
+	# cache directory writable by others is not used
+	chmod 777 $CACHE/c
+	../py3clean t1/lib/
+	../py3compile t1/lib/ -V $VER --cache $CACHE/c 2>/dev/null
+	[ `find $CACHE/c -name '*.pyc' | wc -l` = "0" ] \
+		|| (echo "E: py3compile used world writable cache"; false)
+	rm -rf $CACHE
+	../py3clean t1/lib/
+
+	# --manifest: only mtime changed -> header updated, content -> compiled
+	TMPDIR=`mktemp -d`
+	cp -a t1/lib $TMPDIR/lib
+	../py3compile $TMPDIR/lib -V $VER --manifest $TMPDIR/manifest
+	touch -d '2001-02-03' $TMPDIR/lib/foo/__init__.py
+	../py3compile $TMPDIR/lib -vV $VER --manifest $TMPDIR/manifest 2>&1 \
+		| grep -q 'compiled files: 0, skipped (up-to-date) files: 3,' \
+		|| (echo "E: py3compile --manifest recompiled touched file"; false)
+	../py3compile $TMPDIR/lib -vV $VER 2>&1 \
+		| grep -q 'compiled files: 0, skipped (up-to-date) files: 3,' \
+		|| (echo "E: py3compile --manifest didn't update header"; false)
+	echo 'x = 2' >> $TMPDIR/lib/foo/__init__.py
+	../py3compile $TMPDIR/lib -vV $VER --manifest $TMPDIR/manifest 2>&1 \
+		| grep -q 'compiled files: 1, skipped (up-to-date) files: 2,' \
+		|| (echo "E: py3compile --manifest didn't compile modified file"; false)
+	rm -rf $TMPDIR
+
+	# --destdir: final location is embedded in byte code
+	TMPDIR=`mktemp -d`
+	mkdir -p $TMPDIR/usr/share/foo
+	echo 'x = 1' > $TMPDIR/usr/share/foo/bar.py
+	../py3compile $TMPDIR/usr/share/foo -V $VER --destdir $TMPDIR
+	[ "`co_filename $TMPDIR/usr/share/foo/__pycache__/bar.$TAG.pyc`" = \
+	  "/usr/share/foo/bar.py" ] \
+		|| (echo "E: py3compile --destdir embedded wrong file name"; false)
+	rm -rf $TMPDIR
+
+	# dh_python3 --precompile ships .pyc files with final file names,
+	# py3compile invoked in postinst finds them up-to-date
+	TMPDIR=`mktemp -d`
+	SITEDIR=debian/python3-foo/usr/lib/python3/dist-packages
+	mkdir -p $TMPDIR/$SITEDIR/foo
+	printf 'Source: foo\n\nPackage: python3-foo\nArchitecture: all\n' \
+		> $TMPDIR/debian/control
+	echo 'x = 1' > $TMPDIR/$SITEDIR/foo/__init__.py
+	DH_PYTHON3=`pwd`/../dh_python3
+	(cd $TMPDIR && $DH_PYTHON3 --precompile -V $VER)
+	[ "`co_filename $TMPDIR/$SITEDIR/foo/__pycache__/__init__.$TAG.pyc`" = \
+	  "/usr/lib/python3/dist-packages/foo/__init__.py" ] \
+		|| (echo "E: dh_python3 --precompile failed"; false)
+	../py3compile -vV $VER --destdir $TMPDIR/debian/python3-foo \
+		$TMPDIR/$SITEDIR 2>&1 \
+		| grep -q 'compiled files: 0, skipped (up-to-date) files: 1,' \
+		|| (echo "E: files generated by --precompile are not up-to-date"; false)
+	rm -rf $TMPDIR
+
+	# crashed worker is restarted (up to 3 times), files it didn't byte
+	# compile are reported as failed
+	TMPDIR=`mktemp -d`
+	mkdir $TMPDIR/lib $TMPDIR/site
+	for i in `seq 100`; do
+		echo "x = $i" > $TMPDIR/lib/m$i.py
+	done
+	# worker.py processes exit, in-process worker is slowed down
+	cat > $TMPDIR/site/sitecustomize.py <<-'EOF'
+	import os, sys, time, py_compile
+	_compile = py_compile.compile
+	def compile(*args, **kwargs):
+	    if getattr(sys.modules['__main__'], '__file__', '').endswith('worker.py'):
+	        os._exit(9)
+	    time.sleep(0.02)
+	    return _compile(*args, **kwargs)
+	py_compile.compile = compile
+	EOF
+	if PYTHONPATH=$TMPDIR/site ../py3compile -vV $VER -j 2 $TMPDIR/lib \
+	   2> $TMPDIR/log; then
+		echo "E: py3compile returned 0 after worker crashed"; false
+	fi
+	[ `grep -c 'worker crashed (exit code 9), restarting' $TMPDIR/log` = "3" ] \
+		|| (echo "E: crashed py3compile worker wasn't restarted"; false)
+	grep -q 'failed: [1-9]' $TMPDIR/log \
+		|| (echo "E: py3compile didn't report files of crashed worker"; false)
+	rm -rf $TMPDIR
+fi
+
+# dh_python3 -j gives the same results as a sequential run
+TMPDIR=`mktemp -d`
+mkdir -p $TMPDIR/seq/debian
+echo 'Source: foo' > $TMPDIR/seq/debian/control
+for i in a b c d; do
+	printf '\nPackage: python3-%s\nArchitecture: all\n' $i \
+		>> $TMPDIR/seq/debian/control
+	mkdir -p $TMPDIR/seq/debian/python3-$i/usr/lib/python3/dist-packages/$i \
+		$TMPDIR/seq/debian/python3-$i/usr/bin
+	echo 'x = 1' > $TMPDIR/seq/debian/python3-$i/usr/lib/python3/dist-packages/$i/__init__.py
+	echo '#! /usr/bin/python3' > $TMPDIR/seq/debian/python3-$i/usr/bin/$i
+done
+cp -a $TMPDIR/seq $TMPDIR/par
+DH_PYTHON3=`pwd`/../dh_python3
+(cd $TMPDIR/seq && $DH_PYTHON3)
+(cd $TMPDIR/par && $DH_PYTHON3 -j 3)
+diff -r $TMPDIR/seq $TMPDIR/par \
+	|| (rm -rf $TMPDIR; echo "E: dh_python3 -j 3 results differ"; false)
+rm -rf $TMPDIR
+
 exit 0